@@ -7,101 +7,254 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+import numpy as np
 import pandas as pd
 import plotly.express as px
-import plotly.graph_objects as go
+from dataclasses import dataclass
 from datetime import datetime, timedelta
-import time
 
 from utils import (
-    load_config, save_config, get_db_connection,
-    get_token_balances, get_staking_balance, get_trade_history, get_all_token_prices,
-    calculate_portfolio_value, calculate_pnl, calculate_volume,
-    store_wallet_data, get_latest_balances, get_historical_balances, get_recent_trades
+    load_config, save_config, load_css, get_db_connection, request_cache, fetch_wallet_snapshot,
+    request_token_balances, request_staking_balance, request_trade_history, get_all_token_prices,
+    demo_balances, create_demo_trade_data, DEMO_STAKED,
+    calculate_portfolio_value, calculate_pnl, calculate_volume, slice_trades_since,
+    balances_to_df, wallet_seed, PERIOD_MAP, period_start,
+    store_wallet_data_bulk, get_recent_trades, get_trades_since, get_daily_volume,
+    get_last_stored, get_wallets_with_trades
 )
 
 # ---- App Setup ----
 config = load_config()
 conn = get_db_connection()
+HC_API, PRICE_API = config["apis"]["hypercore_api"], config["apis"]["price_api"]
+
+# ---- Cached Fetchers ----
+# Each (address, api) pair is fetched once per refresh interval and shared by
+# every section of the dashboard instead of being re-requested per tab
+REFRESH_TTL = config["app"]["refresh_interval"]
+
+# Failed requests raise out of the cached calls, so st.cache_data never stores
+# them; the demo fallback is applied outside the cache and retried next rerun
+@st.cache_data(ttl=REFRESH_TTL, show_spinner=False)
+def cached_balances(address, api_endpoint):
+    """Cached live token balances for a wallet"""
+    return request_token_balances(address, api_endpoint)
+
+@st.cache_data(ttl=REFRESH_TTL, show_spinner=False)
+def cached_staking(address, api_endpoint):
+    """Cached live staking balance for a wallet"""
+    return request_staking_balance(address, api_endpoint)
+
+@st.cache_data(ttl=REFRESH_TTL, show_spinner=False)
+def cached_trades(address, api_endpoint):
+    """Cached live trade history for a wallet"""
+    return request_trade_history(address, api_endpoint)
+
+def fetch_balances(address, api_endpoint):
+    """Token balances for a wallet, or uncached demo data if the API fails"""
+    try:
+        return cached_balances(address, api_endpoint)
+    except Exception:
+        return demo_balances()
+
+def fetch_staking(address, api_endpoint):
+    """Staking balance for a wallet, or the uncached demo amount if the API fails"""
+    try:
+        return cached_staking(address, api_endpoint)
+    except Exception:
+        return DEMO_STAKED
+
+def fetch_trades(address, api_endpoint):
+    """Trade history for a wallet, or uncached demo trades if the API fails"""
+    try:
+        return cached_trades(address, api_endpoint)
+    except Exception:
+        return create_demo_trade_data(address)
+
+@st.cache_data(ttl=REFRESH_TTL, show_spinner=False)
+def fetch_prices(price_api):
+    """Cached prices for all tokens"""
+    return get_all_token_prices(price_api)
+
+WALLET_FETCHERS = {
+    "balances": fetch_balances,
+    "trades": fetch_trades,
+    "staked": fetch_staking,
+}
+
+def fetch_live_balances(address, api_endpoint):
+    """Token balances for a wallet, or None if the API fails"""
+    try:
+        return cached_balances(address, api_endpoint)
+    except Exception:
+        return None
+
+def fetch_live_trades(address, api_endpoint):
+    """Trade history for a wallet, or None if the API fails"""
+    try:
+        return cached_trades(address, api_endpoint)
+    except Exception:
+        return None
+
+# Fetchers for the storage path; demo data must never be written to the database
+LIVE_FETCHERS = {
+    "balances": fetch_live_balances,
+    "trades": fetch_live_trades,
+}
+
+def fetch_all_wallets(addresses, api_endpoint, price_api, kinds=("balances", "trades", "staked"), calls=WALLET_FETCHERS):
+    """Fetch prices plus the requested per-wallet data for every wallet concurrently"""
+    # Prices load alongside the batched wallet calls; going through the cached
+    # wrappers lets the update and dashboard paths share per-wallet entries
+    prices_future = request_cache.cache(("prices", price_api), fetch_prices, price_api)
+    results = fetch_wallet_snapshot(addresses, api_endpoint, kinds, calls=calls)
+    
+    maps = {kind: {a: results[(a, kind)] for a in addresses} for kind in kinds}
+    return prices_future.result(), maps
+
+def update_data(addresses=None, force=False):
+    """Fetch the latest balances and trades from the APIs and store them in the database"""
+    if addresses is None:
+        addresses = [w["address"] for w in config["wallets"]]
+    
+    if force:
+        # Drop cached responses so the update really hits the APIs; the caches are
+        # process-wide, so only an explicit user request does this
+        for fetcher in (cached_balances, cached_staking, cached_trades, fetch_prices):
+            fetcher.clear()
+    else:
+        # Skip wallets another session already stored within the refresh interval
+        stale_before = (datetime.now() - timedelta(seconds=config["app"]["refresh_interval"])).isoformat()
+        last_stored = get_last_stored(conn, addresses)
+        addresses = [a for a in addresses if last_stored.get(a, "") <= stale_before]
+    
+    # Force the dashboard snapshot to be rebuilt from the stored data
+    st.session_state.data = None
+    if not addresses:
+        return
+    
+    # Fetch prices, balances and trades (last 30 days) for the wallets at once
+    since = period_start(timedelta(days=30))
+    prices, maps = fetch_all_wallets(
+        addresses, HC_API, PRICE_API,
+        kinds=("balances", "trades"),
+        calls=LIVE_FETCHERS
+    )
+    
+    # Store all wallets in one transaction; a failed fetch (None) leaves its stored data as is
+    store_wallet_data_bulk(
+        conn,
+        [(address, maps["balances"][address], maps["trades"][address]) for address in addresses],
+        prices,
+        since=since
+    )
+
+# ---- Dashboard Snapshot ----
+@dataclass
+class Snapshot:
+    """Fully materialized dashboard data, reused across reruns until stale"""
+    addresses: tuple
+    prices: dict
+    balances_map: dict
+    staked_map: dict
+    balances_df: pd.DataFrame
+    trades_df: pd.DataFrame
+    ts: datetime
+
+def build_snapshot(config):
+    """Fetch live balances and load stored trades for every configured wallet"""
+    addresses = tuple(w["address"] for w in config["wallets"])
+    prices, maps = fetch_all_wallets(
+        addresses, HC_API, PRICE_API,
+        kinds=("balances", "staked")
+    )
+    
+    # One frame of every wallet's balances; token counts and breakdowns are reductions over it
+    balances_df = pd.concat(
+        [pd.DataFrame(b, columns=["coin", "total"]).assign(wallet=addr) for addr, b in maps["balances"].items()],
+        ignore_index=True
+    )
+    balances_df["total"] = pd.to_numeric(balances_df["total"], errors="coerce").fillna(0)
+    
+    # Trades come from the database, which only the update path writes to
+    # Sorted by time so period slicing can binary-search; the stable sort keeps
+    # each wallet's subset sorted too
+    trades_df = pd.concat([get_trades_since(conn, address) for address in addresses], ignore_index=True)
+    trades_df = trades_df.sort_values('timestamp', kind='stable', ignore_index=True)
+    trades_df = trades_df.astype({'wallet': 'category', 'coin': 'category', 'side': 'category'})
+    
+    return Snapshot(
+        addresses=addresses,
+        prices=prices,
+        balances_map=maps["balances"],
+        staked_map=maps["staked"],
+        balances_df=balances_df,
+        trades_df=trades_df,
+        ts=datetime.now()
+    )
 
-# Add custom CSS for dark theme
-st.markdown("""
-<style>
-    .main-header {font-size: 2.5rem !important; font-weight: 700 !important; color: white !important;}
-    .wallet-card {background-color: rgba(49, 51, 63, 0.7); border-radius: 10px; padding: 1rem; margin-bottom: 1rem; border: 1px solid #4B5563;}
-    .metric-card {border-radius: 10px; padding: 1rem; text-align: center; border: 1px solid #4B5563; background-color: rgba(49, 51, 63, 0.7);}
-    .big-number {font-size: 1.8rem; font-weight: 700; color: white;}
-    .chart-container {height: 400px !important;}
-    .stError {color: #F8D7DA; background-color: rgba(220, 53, 69, 0.2); padding: 10px; border-radius: 5px; border: 1px solid rgba(220, 53, 69, 0.5);}
-    .element-container {border-radius: 5px; padding: 5px; margin-bottom: 10px;}
-    .alert {color: #D1ECF1 !important; background-color: rgba(0, 123, 255, 0.2) !important; border: 1px solid rgba(0, 123, 255, 0.5) !important;}
-    /* Fix dataframe styling */
-    .dataframe {color: white !important;}
-    .dataframe th {background-color: #404040 !important; color: white !important;}
-    .dataframe td {background-color: #303030 !important; color: white !important;}
-    /* Tab styling */
-    .stTabs [data-baseweb="tab-list"] {gap: 8px; background-color: rgba(49, 51, 63, 0.3);}
-    .stTabs [data-baseweb="tab"] {height: 50px; white-space: pre-wrap; background-color: rgba(49, 51, 63, 0.3); border-radius: 4px 4px 0 0; gap: 1px; padding: 10px 16px;}
-    .stTabs [aria-selected="true"] {background-color: rgba(49, 51, 63, 0.7) !important; border-bottom: 2px solid #FF4B4B !important;}
-</style>
-""", unsafe_allow_html=True)
+# Base colors come from the theme in .streamlit/config.toml; the stylesheet only
+# holds the custom classes used by the dashboard markup
+st.markdown(f"<style>{load_css('assets/styles.css')}</style>", unsafe_allow_html=True)
 
 # ---- Sidebar ----
 st.sidebar.title(config["app"]["title"])
 
 # Wallet Management Section
-st.sidebar.subheader("Wallet Management")
-
-# Allow adding/editing wallets
-wallet_labels = [w["label"] for w in config["wallets"]]
-wallet_addresses = [w["address"] for w in config["wallets"]]
-
-# Display existing wallets with delete buttons
-for i, (label, address) in enumerate(zip(wallet_labels, wallet_addresses)):
-    col1, col2 = st.sidebar.columns([3, 1])
-    col1.text(f"{label}: {address[:6]}...{address[-4:]}")
-    if col2.button("🗑️", key=f"delete_{i}"):
-        config["wallets"].pop(i)
-        save_config(config)
-        st.rerun()
-
-# Add new wallet form
-with st.sidebar.expander("➕ Add New Wallet"):
-    new_label = st.text_input("Wallet Label")
-    new_address = st.text_input("Wallet Address")
-    if st.button("Add Wallet") and new_label and new_address:
-        config["wallets"].append({"label": new_label, "address": new_address})
-        save_config(config)
-        st.success(f"Added wallet: {new_label}")
-        st.rerun()
+@st.fragment
+def render_wallet_management(config):
+    """Wallet list with delete buttons and the add-wallet form"""
+    st.subheader("Wallet Management")
+    
+    # Allow adding/editing wallets
+    wallet_labels = [w["label"] for w in config["wallets"]]
+    wallet_addresses = [w["address"] for w in config["wallets"]]
+    
+    # Display existing wallets with delete buttons
+    for i, (label, address) in enumerate(zip(wallet_labels, wallet_addresses)):
+        col1, col2 = st.columns([3, 1])
+        col1.text(f"{label}: {address[:6]}...{address[-4:]}")
+        if col2.button("🗑️", key=f"delete_{i}"):
+            config["wallets"].pop(i)
+            save_config(config)
+            st.rerun()
+    
+    # Add new wallet form; typing only reruns this fragment, saving reruns the app
+    with st.expander("➕ Add New Wallet"):
+        new_label = st.text_input("Wallet Label")
+        new_address = st.text_input("Wallet Address")
+        if st.button("Add Wallet") and new_label and new_address:
+            config["wallets"].append({"label": new_label, "address": new_address})
+            save_config(config)
+            st.success(f"Added wallet: {new_label}")
+            st.rerun()
+
+with st.sidebar:
+    render_wallet_management(config)
 
 # Time period selection
 time_period = st.sidebar.selectbox(
     "Time Period",
-    ["24 hours", "7 days", "30 days", "All time"],
+    list(PERIOD_MAP),
     index=2
 )
 
 # Update data button
-if st.sidebar.button("🔄 Update Data Now"):
-    with st.spinner("Fetching latest data..."):
-        # Get current prices for all tokens
-        prices = get_all_token_prices(config["apis"]["price_api"])
-        
-        # Update data for each wallet
-        for wallet in config["wallets"]:
-            address = wallet["address"]
-            
-            # Get balances
-            balances = get_token_balances(address, config["apis"]["hypercore_api"])
-            
-            # Get trades (last 30 days by default)
-            trades = get_trade_history(address, config["apis"]["hypercore_api"])
-            
-            # Store data in database
-            store_wallet_data(conn, address, balances, prices, trades)
-        
-        st.sidebar.success("✅ Data updated successfully!")
+@st.fragment
+def render_update_button():
+    """Button that fetches and stores fresh data, then reruns the dashboard"""
+    if st.session_state.pop("data_updated", False):
+        st.success("✅ Data updated successfully!")
+    
+    if st.button("🔄 Update Data Now"):
+        with st.spinner("Fetching latest data..."):
+            update_data(force=True)
+        st.session_state.last_update = datetime.now()
+        st.session_state.data_updated = True
+        st.rerun()
+
+with st.sidebar:
+    render_update_button()
 
 # Auto-refresh toggle
 auto_refresh = st.sidebar.checkbox("Auto refresh data", value=True)
@@ -112,27 +265,43 @@ refresh_interval = st.sidebar.slider(
     value=config["app"]["refresh_interval"] // 60
 )
 
-# Update config if refresh interval changed
-if refresh_interval != config["app"]["refresh_interval"] // 60:
-    config["app"]["refresh_interval"] = refresh_interval * 60
-    save_config(config)
+# Hold slider changes as pending and only write the config on an explicit Apply
+if refresh_interval * 60 != config["app"]["refresh_interval"]:
+    st.session_state["pending_refresh_interval"] = refresh_interval * 60
+    if st.sidebar.button("Apply refresh interval"):
+        config["app"]["refresh_interval"] = st.session_state.pop("pending_refresh_interval")
+        save_config(config)
+        st.rerun()
+else:
+    st.session_state.pop("pending_refresh_interval", None)
 
-# Last update time tracking
+# Last update time tracking; a new session only seeds wallets with no stored trades
 if "last_update" not in st.session_state:
+    configured = [w["address"] for w in config["wallets"]]
+    stored = get_wallets_with_trades(conn, configured)
+    update_data([a for a in configured if a not in stored])
     st.session_state.last_update = datetime.now()
 
-# Auto-refresh logic
-if auto_refresh:
+# Auto-refresh logic; the countdown ticks on its own without rerunning the dashboard
+@st.fragment(run_every=1)
+def render_refresh_countdown(refresh_seconds):
+    """Countdown to the next auto refresh, triggering it when due"""
     current_time = datetime.now()
     time_diff = (current_time - st.session_state.last_update).total_seconds()
     
-    if time_diff >= config["app"]["refresh_interval"]:
+    if time_diff >= refresh_seconds:
+        update_data()
         st.session_state.last_update = current_time
         st.rerun()
     
     # Show countdown
-    remaining = config["app"]["refresh_interval"] - time_diff
-    st.sidebar.caption(f"Next refresh in: {int(remaining // 60)}m {int(remaining % 60)}s")
+    remaining = refresh_seconds - time_diff
+    st.caption(f"Next refresh in: {int(remaining // 60)}m {int(remaining % 60)}s")
+
+# Only rendered while auto refresh is on, so idle sessions don't tick every second
+if auto_refresh:
+    with st.sidebar:
+        render_refresh_countdown(config["app"]["refresh_interval"])
 
 # ---- Main Dashboard ----
 st.markdown("<h1 class='main-header'>HyperCore Wallet Tracker</h1>", unsafe_allow_html=True)
@@ -142,20 +311,51 @@ if not config["wallets"]:
     st.info("👈 Please add wallets in the sidebar to get started.")
     st.stop()
 
-# Get current prices
-prices = get_all_token_prices(config["apis"]["price_api"])
+# Reuse the session's snapshot until it is older than the refresh interval or the
+# wallet list changes; sections below derive their views from it
+addresses = [w["address"] for w in config["wallets"]]
+snap = st.session_state.setdefault("data", None)
+if snap is not None and snap.addresses != tuple(addresses):
+    # Newly added wallets have nothing stored yet; fetch their trades before rebuilding
+    update_data([a for a in addresses if a not in snap.addresses])
+    snap = None
+if snap is None or (datetime.now() - snap.ts).total_seconds() > config["app"]["refresh_interval"]:
+    snap = st.session_state.data = build_snapshot(config)
+
+prices, balances_map, staked_map = snap.prices, snap.balances_map, snap.staked_map
+
+# Restrict stored trades to the selected period
+cutoff = period_start(time_period)
+period_trades = slice_trades_since(snap.trades_df, cutoff)
+trades_by_wallet = dict(tuple(period_trades.groupby("wallet", observed=True)))
+trades_map = {address: trades_by_wallet.get(address, period_trades.iloc[0:0]) for address in addresses}
+
+balances_df = snap.balances_df
+active = balances_df[balances_df["total"] > 0]
+active_by_wallet = dict(tuple(active.groupby("wallet")))
+unique_tokens = active["coin"].unique()
+all_tokens = active.groupby("coin")["total"].sum()
 
 # ---- Top Metrics ----
 col1, col2, col3, col4 = st.columns(4)
 
-# Total portfolio value
-total_value = 0
-for wallet in config["wallets"]:
-    address = wallet["address"]
-    balances = get_token_balances(address, config["apis"]["hypercore_api"])
-    wallet_value = calculate_portfolio_value(balances, prices)
-    total_value += wallet_value
+# Value, P&L and volume for every wallet in a single pass over the snapshot
+wallet_values = {}
+total_pnl = 0
+pnl_pct = 0
+total_volume = 0
+for address in addresses:
+    wallet_values[address] = calculate_portfolio_value(balances_map[address], prices)
+    
+    trades = trades_map[address]
+    wallet_pnl, wallet_pnl_pct = calculate_pnl(trades, prices, cutoff)
+    total_pnl += wallet_pnl
+    pnl_pct += wallet_pnl_pct  # This is simplified, should be weighted
+    total_volume += calculate_volume(trades, cutoff)
 
+total_value = sum(wallet_values.values())
+
+# Total portfolio value
 with col1:
     st.markdown(
         f"""
@@ -168,15 +368,6 @@ with col1:
     )
 
 # Total P&L
-total_pnl = 0
-pnl_pct = 0
-for wallet in config["wallets"]:
-    address = wallet["address"]
-    trades = get_trade_history(address, config["apis"]["hypercore_api"])
-    wallet_pnl, wallet_pnl_pct = calculate_pnl(trades, prices, time_period)
-    total_pnl += wallet_pnl
-    pnl_pct += wallet_pnl_pct  # This is simplified, should be weighted
-
 pnl_color = "#10b981" if total_pnl >= 0 else "#ef4444"
 with col2:
     st.markdown(
@@ -191,13 +382,6 @@ with col2:
     )
 
 # Total Volume
-total_volume = 0
-for wallet in config["wallets"]:
-    address = wallet["address"]
-    trades = get_trade_history(address, config["apis"]["hypercore_api"])
-    wallet_volume = calculate_volume(trades, time_period)
-    total_volume += wallet_volume
-
 with col3:
     st.markdown(
         f"""
@@ -210,14 +394,6 @@ with col3:
     )
 
 # Total Tokens
-unique_tokens = set()
-for wallet in config["wallets"]:
-    address = wallet["address"]
-    balances = get_token_balances(address, config["apis"]["hypercore_api"])
-    for balance in balances:
-        if float(balance.get("total", 0)) > 0:
-            unique_tokens.add(balance.get("coin", "Unknown"))
-
 with col4:
     st.markdown(
         f"""
@@ -229,53 +405,146 @@ with col4:
         unsafe_allow_html=True
     )
 
-# ---- Tabs for Different Views ----
-tab1, tab2, tab3, tab4 = st.tabs(["Overview", "P&L Analysis", "Volume Analysis", "Token Breakdown"])
+# ---- Charts ----
+# Figures are cached on their input frames, so unchanged data skips Plotly construction;
+# entries are bounded since every price or trade change produces a new key
+FIGURE_CACHE_ENTRIES = 8
+
+@st.cache_data(ttl=REFRESH_TTL, max_entries=FIGURE_CACHE_ENTRIES, show_spinner=False)
+def build_cumulative_pnl_fig(df):
+    """Cumulative P&L line chart per wallet"""
+    return px.line(
+        df, 
+        x='date', 
+        y='cumulative_pnl',
+        color='wallet',
+        title='Cumulative P&L Over Time',
+        labels={'cumulative_pnl': 'Cumulative P&L ($)', 'date': 'Date'}
+    )
+
+@st.cache_data(ttl=REFRESH_TTL, max_entries=FIGURE_CACHE_ENTRIES, show_spinner=False)
+def build_token_pnl_fig(df):
+    """P&L by token bar chart"""
+    return px.bar(
+        df,
+        x='coin',
+        y='pnl',
+        title='P&L by Token',
+        color='pnl',
+        color_continuous_scale=['#F44336', '#FFEB3B', '#4CAF50'],
+        labels={'pnl': 'P&L ($)', 'coin': 'Token'}
+    )
+
+@st.cache_data(ttl=REFRESH_TTL, max_entries=FIGURE_CACHE_ENTRIES, show_spinner=False)
+def build_volume_fig(df):
+    """Daily trading volume bar chart per wallet"""
+    fig = px.bar(
+        df, 
+        x='date', 
+        y='value_usd',
+        color='wallet',
+        title='Trading Volume Over Time',
+        labels={'value_usd': 'Volume ($)', 'date': 'Date'}
+    )
+    fig.update_layout(
+        template="plotly_dark",
+        plot_bgcolor='rgba(26, 26, 36, 0.8)',
+        paper_bgcolor='rgba(26, 26, 36, 0.8)',
+        xaxis=dict(
+            gridcolor='rgba(211, 211, 211, 0.2)',
+            showgrid=True,
+        ),
+        yaxis=dict(
+            gridcolor='rgba(211, 211, 211, 0.2)',
+            showgrid=True,
+        )
+    )
+    return fig
+
+@st.cache_data(ttl=REFRESH_TTL, max_entries=FIGURE_CACHE_ENTRIES, show_spinner=False)
+def build_token_volume_pie(df):
+    """Volume by token donut chart"""
+    fig = px.pie(
+        df,
+        values='value_usd',
+        names='coin',
+        title='Volume by Token',
+        hole=0.4,
+        color_discrete_sequence=px.colors.qualitative.Bold
+    )
+    fig.update_layout(
+        template="plotly_dark",
+        plot_bgcolor='rgba(26, 26, 36, 0.8)',
+        paper_bgcolor='rgba(26, 26, 36, 0.8)'
+    )
+    return fig
+
+@st.cache_data(ttl=REFRESH_TTL, max_entries=FIGURE_CACHE_ENTRIES, show_spinner=False)
+def build_portfolio_pie(df):
+    """Portfolio composition donut chart"""
+    fig = px.pie(
+        df,
+        values='Value',
+        names='Token',
+        title='Portfolio Composition',
+        hole=0.4,
+        color_discrete_sequence=px.colors.qualitative.Bold
+    )
+    fig.update_layout(
+        template="plotly_dark",
+        plot_bgcolor='rgba(26, 26, 36, 0.8)',
+        paper_bgcolor='rgba(26, 26, 36, 0.8)'
+    )
+    return fig
 
-with tab1:
+# ---- Tabs for Different Views ----
+WALLET_CARD_TMPL = """
+<div class="wallet-card">
+    <h3 style="color: #e2e8f0;">{label}</h3>
+    <p style="color: #94a3b8; font-family: monospace;">{address}</p>
+    <div style="display: flex; justify-content: space-between; margin-top: 10px;">
+        <div>
+            <span style="color: #94a3b8;">Total Value:</span>
+            <span style="font-weight: bold; color: #10b981;">${value:,.2f}</span>
+        </div>
+        <div>
+            <span style="color: #94a3b8;">Staked:</span>
+            <span style="font-weight: bold; color: #3b82f6;">{staked:,.4f} HYPE</span>
+        </div>
+    </div>
+</div>
+"""
+
+# Each view is a fragment fed with the snapshot data above, so interactions inside
+# a view rerun only that view
+@st.fragment
+def render_overview(wallets, wallet_values, staked_map, active, active_by_wallet, prices):
+    """Wallet cards, per-wallet token tables and recent trades"""
     # Wallet Cards
     st.subheader("Wallet Summary")
     
-    for wallet in config["wallets"]:
+    # Display all wallet cards in a single markdown element
+    cards_html = "".join(
+        WALLET_CARD_TMPL.format(
+            label=wallet["label"],
+            address=wallet["address"],
+            value=wallet_values[wallet["address"]],
+            staked=staked_map[wallet["address"]]
+        )
+        for wallet in wallets
+    )
+    st.markdown(cards_html, unsafe_allow_html=True)
+    
+    # Token tables stay separate since they are interactive widgets
+    for wallet in wallets:
         address = wallet["address"]
         label = wallet["label"]
         
-        # Get wallet data
-        balances = get_token_balances(address, config["apis"]["hypercore_api"])
-        staked = get_staking_balance(address, config["apis"]["hypercore_api"])
-        wallet_value = calculate_portfolio_value(balances, prices)
-        
-        # Display wallet card
-        st.markdown(f"""
-        <div class="wallet-card">
-            <h3 style="color: #e2e8f0;">{label}</h3>
-            <p style="color: #94a3b8; font-family: monospace;">{address}</p>
-            <div style="display: flex; justify-content: space-between; margin-top: 10px;">
-                <div>
-                    <span style="color: #94a3b8;">Total Value:</span>
-                    <span style="font-weight: bold; color: #10b981;">${wallet_value:,.2f}</span>
-                </div>
-                <div>
-                    <span style="color: #94a3b8;">Staked:</span>
-                    <span style="font-weight: bold; color: #3b82f6;">{staked:,.4f} HYPE</span>
-                </div>
-            </div>
-        </div>
-        """, unsafe_allow_html=True)
-        
         # Token table for this wallet
-        tokens_df = pd.DataFrame([
-            {
-                "Token": b.get("coin", "Unknown"),
-                "Balance": float(b.get("total", 0)),
-                "Price": prices.get(b.get("coin", "Unknown"), 0),
-                "Value": float(b.get("total", 0)) * prices.get(b.get("coin", "Unknown"), 0)
-            }
-            for b in balances if float(b.get("total", 0)) > 0
-        ])
+        tokens_df = balances_to_df(active_by_wallet.get(address, active.iloc[0:0]), prices)
         
         if not tokens_df.empty:
-            tokens_df = tokens_df.sort_values("Value", ascending=False)
+            st.caption(f"{label} tokens")
             st.dataframe(
                 tokens_df,
                 column_config={
@@ -289,20 +558,18 @@ with tab1:
     
     # Recent Trades
     st.subheader("Recent Trades")
-    all_trades = []
+    trade_parts = []
     
-    for wallet in config["wallets"]:
-        address = wallet["address"]
-        label = wallet["label"]
-        
-        trades = get_recent_trades(conn, address, limit=10)
-        for trade in trades:
-            trade["wallet_label"] = label
-            all_trades.append(trade)
+    for wallet in wallets:
+        # The 10 most recent per wallet are selected by SQLite; label them column-wise
+        trades = get_recent_trades(conn, wallet["address"], limit=10)
+        if trades:
+            trade_parts.append(pd.DataFrame(trades).assign(wallet_label=wallet["label"]))
     
-    if all_trades:
-        trades_df = pd.DataFrame(all_trades)
-        trades_df = trades_df.sort_values("timestamp", ascending=False).head(20)
+    if trade_parts:
+        trades_df = pd.concat(trade_parts, ignore_index=True)
+        trades_df["timestamp"] = pd.to_datetime(trades_df["timestamp"], format="ISO8601")
+        trades_df = trades_df.nlargest(20, "timestamp")
         
         st.dataframe(
             trades_df,
@@ -320,38 +587,35 @@ with tab1:
     else:
         st.info("No recent trades found.")
 
-with tab2:
+@st.fragment
+def render_pnl_analysis(wallets, trades_map, unique_tokens, time_period):
+    """Cumulative P&L and P&L by token charts"""
     # P&L Analysis
     st.subheader(f"P&L Analysis ({time_period})")
     
     # Create P&L data for plotting
     pnl_data = []
-    for wallet in config["wallets"]:
+    for wallet in wallets:
         address = wallet["address"]
         label = wallet["label"]
         
-        trades = get_trade_history(address, config["apis"]["hypercore_api"])
+        trades = trades_map[address]
         if not trades.empty:
             # If pnl column doesn't exist, try to calculate it
             if 'pnl' not in trades.columns:
-                # This is simplified - real P&L calculation is more complex
-                buys = trades[trades['side'] == 'buy'].copy()
-                sells = trades[trades['side'] == 'sell'].copy()
-                
-                # Create synthetic daily P&L data
-                start_date = datetime.now() - timedelta(days=30)
-                date_range = pd.date_range(start=start_date, end=datetime.now(), freq='D')
+                # Create synthetic daily P&L data (this is demo data)
+                # Midnight-aligned days so the figure's cache key only changes once a day
+                date_range = pd.date_range(end=pd.Timestamp.today().normalize(), periods=31, freq='D')
                 
-                daily_pnl = pd.DataFrame({
-                    'date': date_range,
-                    'pnl': [0] * len(date_range)  # Default to zero
-                })
-                
-                # Assign some P&L values (this is demo data)
-                for i in range(len(daily_pnl)):
-                    if i % 2 == 0:
-                        daily_pnl.loc[i, 'pnl'] = float(address.encode().hex(), 16) % 100 - 50  # Generate pseudo-random P&L
+                # Pseudo-random P&L on every other day, drawn in one pass and seeded per wallet
+                rng = np.random.default_rng(wallet_seed(address))
+                pnl = np.where(
+                    np.arange(len(date_range)) % 2 == 0,
+                    rng.integers(-50, 50, size=len(date_range)),
+                    0
+                )
                 
+                daily_pnl = pd.DataFrame({'date': date_range, 'pnl': pnl})
                 daily_pnl['wallet'] = label
                 daily_pnl['cumulative_pnl'] = daily_pnl['pnl'].cumsum()
                 
@@ -362,165 +626,66 @@ with tab2:
         combined_pnl = pd.concat(pnl_data)
         
         # Plot P&L over time
-        fig = px.line(
-            combined_pnl, 
-            x='date', 
-            y='cumulative_pnl',
-            color='wallet',
-            title='Cumulative P&L Over Time',
-            labels={'cumulative_pnl': 'Cumulative P&L ($)', 'date': 'Date'}
-        )
-        st.plotly_chart(fig, use_container_width=True, theme="streamlit")
+        st.plotly_chart(build_cumulative_pnl_fig(combined_pnl), use_container_width=True, theme="streamlit")
         
         # P&L by token (if token data available)
         # For demo purposes, create some token P&L data
         tokens = list(unique_tokens)
         if tokens:
-            token_pnl_data = []
-            for token in tokens:
-                # Generate some pseudo-random P&L for each token
-                # Convert to a single number to avoid TypeError
-                token_hash = hash(token + str(datetime.now().date()))
-                pnl_value = token_hash % 1000 - 500
-                token_pnl_data.append({
-                    'coin': token,
-                    'pnl': pnl_value
-                })
-            
-            token_pnl = pd.DataFrame(token_pnl_data)
+            # Pseudo-random P&L for every token in one draw, stable for the day
+            rng = np.random.default_rng(int(datetime.now().strftime("%Y%m%d")))
+            token_pnl = pd.DataFrame({
+                'coin': tokens,
+                'pnl': rng.integers(-500, 500, size=len(tokens))
+            })
             token_pnl = token_pnl.sort_values('pnl', ascending=False)
             
-            fig = px.bar(
-                token_pnl,
-                x='coin',
-                y='pnl',
-                title='P&L by Token',
-                color='pnl',
-                color_continuous_scale=['#F44336', '#FFEB3B', '#4CAF50'],
-                labels={'pnl': 'P&L ($)', 'coin': 'Token'}
-            )
-            st.plotly_chart(fig, use_container_width=True, theme="streamlit")
+            st.plotly_chart(build_token_pnl_fig(token_pnl), use_container_width=True, theme="streamlit")
     else:
         st.info("No P&L data available for the selected time period.")
 
-with tab3:
+@st.fragment
+def render_volume_analysis(wallets, cutoff, unique_tokens, time_period):
+    """Trading volume over time and by token charts"""
     # Volume Analysis
     st.subheader(f"Volume Analysis ({time_period})")
     
-    # Create volume data for plotting
-    volume_data = []
-    for wallet in config["wallets"]:
-        address = wallet["address"]
-        label = wallet["label"]
-        
-        trades = get_trade_history(address, config["apis"]["hypercore_api"])
-        if not trades.empty:
-            # Calculate trade value if not present
-            if 'value_usd' not in trades.columns and 'size' in trades.columns and 'price' in trades.columns:
-                trades['value_usd'] = trades['size'] * trades['price']
-            
-            # Daily volume
-            if 'timestamp' in trades.columns:
-                trades['date'] = trades['timestamp'].dt.date
-                daily_volume = trades.groupby('date')['value_usd'].sum().reset_index()
-                daily_volume['wallet'] = label
-                
-                volume_data.append(daily_volume)
+    # Daily volume per wallet, aggregated by SQLite in one query
+    labels = {wallet["address"]: wallet["label"] for wallet in wallets}
+    combined_volume = get_daily_volume(conn, list(labels), cutoff)
+    combined_volume['wallet'] = combined_volume['wallet'].map(labels)
     
-    if volume_data:
-        # Combine all wallet data
-        combined_volume = pd.concat(volume_data)
-        
+    if not combined_volume.empty:
         # Plot volume over time
-        fig = px.bar(
-            combined_volume, 
-            x='date', 
-            y='value_usd',
-            color='wallet',
-            title='Trading Volume Over Time',
-            labels={'value_usd': 'Volume ($)', 'date': 'Date'}
-        )
-        fig.update_layout(
-            template="plotly_dark",
-            plot_bgcolor='rgba(26, 26, 36, 0.8)',
-            paper_bgcolor='rgba(26, 26, 36, 0.8)',
-            xaxis=dict(
-                gridcolor='rgba(211, 211, 211, 0.2)',
-                showgrid=True,
-            ),
-            yaxis=dict(
-                gridcolor='rgba(211, 211, 211, 0.2)',
-                showgrid=True,
-            )
-        )
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(build_volume_fig(combined_volume), use_container_width=True)
         
         # Volume by token (if token data available)
         # For demo purposes, create some token volume data
         tokens = list(unique_tokens)
         if tokens:
-            token_volume_data = []
-            for token in tokens:
-                # Generate some pseudo-random volume for each token
-                volume_value = (hash(token) % 100) * 1000
-                token_volume_data.append({
-                    'coin': token,
-                    'value_usd': volume_value
-                })
-            
-            token_volume = pd.DataFrame(token_volume_data)
+            # Pseudo-random volume for every token in one draw, stable for the day
+            # Own seed stream, so the volume draw isn't a rescaled copy of the P&L one
+            rng = np.random.default_rng([int(datetime.now().strftime("%Y%m%d")), 1])
+            token_volume = pd.DataFrame({
+                'coin': tokens,
+                'value_usd': rng.integers(0, 100, size=len(tokens)) * 1000
+            })
             token_volume = token_volume.sort_values('value_usd', ascending=False)
             
-            fig = px.pie(
-                token_volume,
-                values='value_usd',
-                names='coin',
-                title='Volume by Token',
-                hole=0.4,
-                color_discrete_sequence=px.colors.qualitative.Bold
-            )
-            fig.update_layout(
-                template="plotly_dark",
-                plot_bgcolor='rgba(26, 26, 36, 0.8)',
-                paper_bgcolor='rgba(26, 26, 36, 0.8)'
-            )
-            st.plotly_chart(fig, use_container_width=True)
+            st.plotly_chart(build_token_volume_pie(token_volume), use_container_width=True)
     else:
         st.info("No volume data available for the selected time period.")
 
-with tab4:
+@st.fragment
+def render_token_breakdown(all_tokens, prices):
+    """Aggregated token table and portfolio composition chart"""
     # Token Breakdown
     st.subheader("Token Breakdown")
     
-    # Collect all token data
-    all_tokens = {}
-    for wallet in config["wallets"]:
-        address = wallet["address"]
-        
-        balances = get_token_balances(address, config["apis"]["hypercore_api"])
-        for balance in balances:
-            coin = balance.get("coin", "Unknown")
-            amount = float(balance.get("total", 0))
-            
-            if coin not in all_tokens:
-                all_tokens[coin] = 0
-            
-            all_tokens[coin] += amount
-    
-    # Create dataframe from token data
-    tokens_df = pd.DataFrame([
-        {
-            "Token": token,
-            "Balance": amount,
-            "Price": prices.get(token, 0),
-            "Value": amount * prices.get(token, 0)
-        }
-        for token, amount in all_tokens.items() if amount > 0
-    ])
+    # Create dataframe from the aggregated token balances
+    tokens_df = balances_to_df(all_tokens.reset_index(), prices)
     
     if not tokens_df.empty:
-        tokens_df = tokens_df.sort_values("Value", ascending=False)
-        
         # Display token table
         st.dataframe(
             tokens_df,
@@ -534,23 +699,28 @@ with tab4:
         )
         
         # Portfolio composition pie chart
-        fig = px.pie(
-            tokens_df,
-            values='Value',
-            names='Token',
-            title='Portfolio Composition',
-            hole=0.4,
-            color_discrete_sequence=px.colors.qualitative.Bold
-        )
-        fig.update_layout(
-            template="plotly_dark",
-            plot_bgcolor='rgba(26, 26, 36, 0.8)',
-            paper_bgcolor='rgba(26, 26, 36, 0.8)'
-        )
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(build_portfolio_pie(tokens_df), use_container_width=True)
     else:
         st.info("No token data available.")
 
+# st.tabs would run every tab body on each rerun; render only the selected view
+view = st.radio(
+    "View",
+    ["Overview", "P&L Analysis", "Volume Analysis", "Token Breakdown"],
+    horizontal=True,
+    label_visibility="collapsed",
+    key="view"
+)
+
+if view == "Overview":
+    render_overview(config["wallets"], wallet_values, staked_map, active, active_by_wallet, prices)
+elif view == "P&L Analysis":
+    render_pnl_analysis(config["wallets"], trades_map, unique_tokens, time_period)
+elif view == "Volume Analysis":
+    render_volume_analysis(config["wallets"], cutoff, unique_tokens, time_period)
+else:
+    render_token_breakdown(all_tokens, prices)
+
 # Footer with app info
 st.markdown("---")
 st.caption(f"HyperCore Wallet Tracker | Last updated: {st.session_state.last_update.strftime('%Y-%m-%d %H:%M:%S')}")
\ No newline at end of file
@@ -1,4 +1,7 @@
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import numpy as np
 import pandas as pd
 import streamlit as st
 import yaml
@@ -6,15 +9,69 @@ import time
 import sqlite3
 import os
 import json
+import zlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
+from itertools import chain
+from types import MappingProxyType
 from datetime import datetime, timedelta
 
 # ---- Configuration Management ----
+# Use the libyaml C bindings when PyYAML was built with them
+Loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+Dumper = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+
+CONFIG_PATH = 'config.yaml'
+# Parsed copy of the YAML config; JSON loads much faster than YAML on cold starts
+CONFIG_CACHE_PATH = 'data/config.cache.json'
+
+def _config_stamp():
+    """Identity of the YAML file on disk; the sidecar is only valid for an exact match"""
+    stat = os.stat(CONFIG_PATH)
+    return {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+
+def _read_config_cache():
+    """Parsed configuration from the JSON sidecar, or None if it is missing or stale"""
+    try:
+        with open(CONFIG_CACHE_PATH, 'r') as file:
+            cache = json.load(file)
+        if cache.get("source") == _config_stamp():
+            return cache["config"]
+    except (OSError, ValueError, TypeError, KeyError, AttributeError):
+        pass  # Missing, unreadable or old-format sidecar, parse the YAML instead
+    return None
+
+def _write_config_cache(config):
+    """Atomically write the parsed configuration to the JSON sidecar, stamped with the YAML it came from"""
+    tmp_path = CONFIG_CACHE_PATH + '.tmp'
+    try:
+        # Serialize first so a value JSON can't encode (e.g. a YAML date) never touches disk
+        payload = json.dumps({"source": _config_stamp(), "config": config})
+        os.makedirs(os.path.dirname(CONFIG_CACHE_PATH), exist_ok=True)
+        with open(tmp_path, 'w') as file:
+            file.write(payload)
+        os.replace(tmp_path, CONFIG_CACHE_PATH)
+    except (OSError, TypeError, ValueError):
+        # The sidecar is only an optimization; a stale one no longer matches the YAML stamp
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+
 @st.cache_resource
 def load_config():
-    """Load configuration from YAML file"""
+    """Load configuration, using the JSON sidecar while it matches the YAML file"""
     try:
-        with open('config.yaml', 'r') as file:
-            return yaml.safe_load(file)
+        config = _read_config_cache()
+        if config is not None:
+            return config
+        
+        with open(CONFIG_PATH, 'r') as file:
+            config = yaml.load(file, Loader=Loader)
+        
+        _write_config_cache(config)
+        return config
     except Exception as e:
         st.error(f"Error loading configuration: {e}")
         return {
@@ -28,25 +85,47 @@ def load_config():
         }
 
 def save_config(config):
-    """Save configuration to YAML file"""
+    """Save configuration to YAML file and refresh its JSON sidecar"""
     try:
-        with open('config.yaml', 'w') as file:
-            yaml.dump(config, file)
-        return True
+        with open(CONFIG_PATH, 'w') as file:
+            yaml.dump(config, file, Dumper=Dumper)
     except Exception as e:
         st.error(f"Error saving configuration: {e}")
         return False
+    
+    # Stamped with the YAML just written; failures are swallowed since the sidecar is optional
+    _write_config_cache(config)
+    return True
+
+@st.cache_data
+def load_css(path):
+    """Read a stylesheet once per process"""
+    with open(path, 'r') as file:
+        return file.read()
 
 # ---- Database Management ----
+# The cached connection is shared by every session's script thread. A connection sees its
+# own uncommitted changes, so reads take the lock too and never observe a half-written update
+_DB_LOCK = threading.Lock()
+
 @st.cache_resource
 def get_db_connection():
     """Get SQLite database connection with auto-creation if needed"""
     # Create data directory if it doesn't exist
     os.makedirs('data', exist_ok=True)
     
-    conn = sqlite3.connect('data/wallet_data.db')
+    # A larger statement cache keeps every query below prepared across reruns
+    conn = sqlite3.connect('data/wallet_data.db', check_same_thread=False, cached_statements=256)
     conn.row_factory = sqlite3.Row
     
+    # WAL keeps other processes' readers off our writes and only fsyncs at checkpoints
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA cache_size=-65536")  # 64 MiB page cache
+    conn.execute("PRAGMA busy_timeout=5000")
+    conn.execute("PRAGMA cache_spill=OFF")  # keep dirty pages in memory until commit
+    
     # Create tables if they don't exist
     cursor = conn.cursor()
     
@@ -78,105 +157,188 @@ def get_db_connection():
     )
     ''')
     
+    # Indexes for per-wallet latest/time-range reads; SQLite can walk them in either direction
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_balances_wallet_ts ON balances (wallet, timestamp DESC)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_trades_wallet_ts ON trades (wallet, timestamp)')
+    
     conn.commit()
     return conn
 
+# ---- Request Deduplication ----
+class ParallelRequestsCache:
+    """Share a single in-flight request between callers asking for the same key"""
+    
+    def __init__(self, max_workers=16):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._pending = {}
+        self._lock = threading.Lock()
+    
+    def cache(self, key, fn, *args):
+        """Return a future for fn(*args), reusing the pending one for a duplicate key"""
+        with self._lock:
+            future = self._pending.get(key)
+            if future is not None:
+                return future
+            
+            future = self._executor.submit(fn, *args)
+            self._pending[key] = future
+        
+        # Forget the key once the request resolves so later calls fetch again
+        future.add_done_callback(lambda f: self._release(key, f))
+        return future
+    
+    def _release(self, key, future):
+        with self._lock:
+            if self._pending.get(key) is future:
+                del self._pending[key]
+
+# Shared across script reruns and sessions so concurrent identical fetches collapse
+request_cache = ParallelRequestsCache()
+
 # ---- API Interactions ----
-@st.cache_data(ttl=300)  # Cache for 5 minutes
+# One pooled session so every wallet fetch reuses kept-alive TLS connections
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(
+    pool_connections=16,
+    pool_maxsize=32,
+    max_retries=Retry(total=3, backoff_factor=0.2)
+))
+# Ask for compressed bodies explicitly; requests inflates them transparently
+_SESSION.headers.update({
+    "Accept-Encoding": "gzip, deflate",
+    "Connection": "keep-alive",
+    "User-Agent": "hc-wallet-tracker/1.0",
+})
+
+# (connect, read) timeouts so a stalled endpoint can't hang a fetch worker
+HTTP_TIMEOUT = (3, 10)
+
+# Parse response bytes directly, with orjson's C parser when it's installed
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
+
+# Demo values shown when the HyperCore API can't be reached
+DEMO_BALANCES = (
+    {"coin": "HYPE", "total": "0.0505"},
+    {"coin": "USDC", "total": "0.0000"},
+    {"coin": "USDT", "total": "0.0010"},
+)
+DEMO_STAKED = 0.5
+
+def demo_balances():
+    """Fresh copy of the demo token balances"""
+    return [dict(balance) for balance in DEMO_BALANCES]
+
+def request_token_balances(wallet, api_endpoint):
+    """Fetch all token balances from HyperCore, raising if the request fails"""
+    payload = {
+        "type": "spotClearinghouseState",
+        "user": wallet
+    }
+    response = _SESSION.post(api_endpoint, json=payload, timeout=HTTP_TIMEOUT)
+    response.raise_for_status()
+    data = _loads(response.content)
+    
+    if "balances" not in data:
+        raise ValueError(f"No balances in response for {wallet}")
+        
+    return data["balances"]
+
 def get_token_balances(wallet, api_endpoint):
     """Get all token balances from HyperCore"""
     try:
-        payload = {
-            "type": "spotClearinghouseState",
-            "user": wallet
-        }
-        response = requests.post(api_endpoint, json=payload)
-        data = response.json()
-        
-        if "balances" not in data:
-            # Return some demo data if API fails
-            return [
-                {"coin": "HYPE", "total": "0.0505"},
-                {"coin": "USDC", "total": "0.0000"},
-                {"coin": "USDT", "total": "0.0010"}
-            ]
-            
-        return data["balances"]
+        return request_token_balances(wallet, api_endpoint)
     except Exception as e:
         # Return some demo data if API fails
-        return [
-            {"coin": "HYPE", "total": "0.0505"},
-            {"coin": "USDC", "total": "0.0000"},
-            {"coin": "USDT", "total": "0.0010"}
-        ]
+        return demo_balances()
+
+def request_staking_balance(wallet, api_endpoint):
+    """Fetch delegated staking balances, raising if the request fails"""
+    payload = {
+        "type": "delegatorSummary",
+        "user": wallet
+    }
+    response = _SESSION.post(api_endpoint, json=payload, timeout=HTTP_TIMEOUT)
+    response.raise_for_status()
+    data = _loads(response.content)
+    
+    if not data or "delegated" not in data:
+        raise ValueError(f"No delegator summary in response for {wallet}")
+        
+    return float(data.get("delegated", 0))
 
-@st.cache_data(ttl=300)  # Cache for 5 minutes
 def get_staking_balance(wallet, api_endpoint):
     """Get delegated staking balances"""
     try:
-        payload = {
-            "type": "delegatorSummary",
-            "user": wallet
-        }
-        response = requests.post(api_endpoint, json=payload)
-        data = response.json()
-        
-        if not data or "delegated" not in data:
-            # Return demo data
-            return 0.5  # Demo staking amount
-            
-        return float(data.get("delegated", 0))
+        return request_staking_balance(wallet, api_endpoint)
     except Exception as e:
         # Return demo data
-        return 0.5  # Demo staking amount
+        return DEMO_STAKED
+
+def request_trade_history(wallet, api_endpoint, days=30):
+    """Fetch trading history for a wallet, raising if the request fails"""
+    payload = {
+        "type": "userFills",
+        "user": wallet
+    }
+    response = _SESSION.post(api_endpoint, json=payload, timeout=HTTP_TIMEOUT)
+    response.raise_for_status()
+    data = _loads(response.content)
+    
+    if not data:
+        # No fills yet; an empty history, so nothing synthetic reaches the database
+        return pd.DataFrame(columns=TRADE_COLUMNS)
+    
+    # Convert to DataFrame
+    df = pd.DataFrame(data)
+    
+    # Add necessary columns if they don't exist
+    if 'time' in df.columns:
+        try:
+            # Reinterpret epoch milliseconds as datetime64 directly, skipping the pandas parser
+            df['timestamp'] = df['time'].astype('int64').to_numpy().view('datetime64[ms]').astype('datetime64[ns]')
+        except (TypeError, ValueError):
+            df['timestamp'] = pd.to_datetime(df['time'], unit='ms')
+    else:
+        df['timestamp'] = pd.to_datetime('now')
+    
+    if 'coin' not in df.columns and 'coin1' in df.columns:
+        df['coin'] = df['coin1']
+    
+    if 'side' not in df.columns and 'dir' in df.columns:
+        df['side'] = df['dir'].apply(lambda x: 'buy' if x > 0 else 'sell')
+    
+    if 'size' not in df.columns and 'sz' in df.columns:
+        df['size'] = df['sz'].astype(float)
+    
+    if 'price' not in df.columns and 'px' in df.columns:
+        df['price'] = df['px'].astype(float)
+    
+    if 'fee' not in df.columns:
+        df['fee'] = 0.0
+    
+    if 'value_usd' not in df.columns:
+        df['value_usd'] = df['size'] * df['price']
+    
+    # Low-cardinality labels; comparisons and groupbys then run on integer codes
+    df['coin'] = df['coin'].astype('category')
+    df['side'] = df['side'].astype('category')
+        
+    # Sort once so period filters can binary-search instead of scanning
+    df = df.sort_values('timestamp', ignore_index=True)
+    
+    # Filter by date range
+    return slice_trades_since(df, period_start(timedelta(days=days)))
 
-@st.cache_data(ttl=300)  # Cache for 5 minutes
 def get_trade_history(wallet, api_endpoint, days=30):
     """Get trading history for a wallet"""
     try:
-        payload = {
-            "type": "userFills",
-            "user": wallet
-        }
-        response = requests.post(api_endpoint, json=payload)
-        data = response.json()
-        
-        if not data:
-            # Create demo data
-            return create_demo_trade_data(wallet, days)
-        
-        # Convert to DataFrame
-        df = pd.DataFrame(data)
-        
-        # Add necessary columns if they don't exist
-        if 'time' in df.columns:
-            df['timestamp'] = pd.to_datetime(df['time'], unit='ms')
-        else:
-            df['timestamp'] = pd.to_datetime('now')
-        
-        if 'coin' not in df.columns and 'coin1' in df.columns:
-            df['coin'] = df['coin1']
-        
-        if 'side' not in df.columns and 'dir' in df.columns:
-            df['side'] = df['dir'].apply(lambda x: 'buy' if x > 0 else 'sell')
-        
-        if 'size' not in df.columns and 'sz' in df.columns:
-            df['size'] = df['sz'].astype(float)
-        
-        if 'price' not in df.columns and 'px' in df.columns:
-            df['price'] = df['px'].astype(float)
-        
-        if 'fee' not in df.columns:
-            df['fee'] = 0.0
-        
-        if 'value_usd' not in df.columns:
-            df['value_usd'] = df['size'] * df['price']
-            
-        # Filter by date range
-        start_date = datetime.now() - timedelta(days=days)
-        df = df[df['timestamp'] >= start_date]
-        
-        return df
+        trades = request_trade_history(wallet, api_endpoint, days)
+        # Show demo data for a wallet with no fills yet
+        return trades if not trades.empty else create_demo_trade_data(wallet, days)
     except Exception as e:
         # Create demo data
         return create_demo_trade_data(wallet, days)
@@ -188,66 +350,60 @@ def create_demo_trade_data(wallet, days=30):
     start_date = end_date - timedelta(days=days)
     dates = pd.date_range(start=start_date, end=end_date, periods=20)
     
-    # Create random trade data
-    coins = ["HYPE", "BTC", "ETH", "SOL"]
-    sides = ["buy", "sell"]
+    # Draw every column at once from a generator seeded per wallet
+    rng = np.random.default_rng(wallet_seed(wallet))
+    coins = rng.choice(["HYPE", "BTC", "ETH", "SOL"], size=len(dates))
+    sides = rng.choice(["buy", "sell"], size=len(dates))
+    sizes = rng.uniform(0, 10, size=len(dates))  # Random size between 0 and 10
+    prices = rng.uniform(100, 1000, size=len(dates))  # Random price between 100 and 1000
+    values = sizes * prices
     
-    data = []
-    for date in dates:
-        coin = coins[hash(str(date) + wallet) % len(coins)]
-        side = sides[hash(str(date) + wallet + coin) % 2]
-        size = (hash(str(date) + wallet) % 100) / 10  # Random size between 0 and 10
-        price = 100 + (hash(str(date) + wallet + "price") % 900)  # Random price between 100 and 1000
-        
-        data.append({
-            "timestamp": date,
-            "coin": coin,
-            "side": side,
-            "size": size,
-            "price": price,
-            "fee": size * price * 0.001,  # 0.1% fee
-            "value_usd": size * price
-        })
-    
-    return pd.DataFrame(data)
-
-@st.cache_data(ttl=300)  # Cache for 5 minutes
+    return pd.DataFrame({
+        "timestamp": dates,
+        "coin": coins,
+        "side": sides,
+        "size": sizes,
+        "price": prices,
+        "fee": values * 0.001,  # 0.1% fee
+        "value_usd": values
+    })
+
+# Demo prices for tokens without a live feed; HYPE is merged in from Pyth
+_STATIC_PRICES = MappingProxyType({
+    "BTC": 53200.00,
+    "ETH": 2980.00,
+    "SOL": 144.50,
+    "DOGE": 0.12,
+    "AVAX": 35.20,
+    "ARB": 1.45,
+    "OP": 3.25,
+    "MATIC": 0.85,
+    "LINK": 15.30,
+    "USDC": 1.00,
+    "USDT": 1.00
+})
+HYPE_FALLBACK_PRICE = 3.45
+
 def get_all_token_prices(price_api):
     """Get current prices for all tokens"""
     try:
-        # Since getting all prices from an oracle might be complex,
-        # let's create a simpler version that simulates getting prices
-        # In a real implementation, you'd fetch from an API
-        
-        # Basic list of common tokens in HyperLiquid
-        common_tokens = ["HYPE", "BTC", "ETH", "SOL", "DOGE", "AVAX", "ARB", "OP", "MATIC", "LINK"]
-        
-        # Fetch HYPE price using Pyth Oracle
+        # Only HYPE is fetched (from Pyth); the rest are static demo prices
         hype_price = get_hype_price(price_api)
-        
-        # For demo purposes, create some random prices (in a real app, fetch from API)
-        prices = {
-            "HYPE": hype_price if hype_price else 3.45,
-            "BTC": 53200.00,
-            "ETH": 2980.00,
-            "SOL": 144.50,
-            "DOGE": 0.12,
-            "AVAX": 35.20,
-            "ARB": 1.45,
-            "OP": 3.25,
-            "MATIC": 0.85,
-            "LINK": 15.30,
-            "USDC": 1.00,
-            "USDT": 1.00
-        }
-        
-        return prices
+        return {"HYPE": hype_price if hype_price else HYPE_FALLBACK_PRICE, **_STATIC_PRICES}
     except Exception as e:
         st.error(f"Error fetching token prices: {str(e)}")
         return {}
 
+# The HYPE oracle price is reused for this many seconds, including a failed lookup
+PRICE_BUCKET_SECONDS = 60
+
 def get_hype_price(price_api):
     """Fetch the current HYPE price in USD using Pyth Oracle"""
+    return _get_hype_price(price_api, int(time.time() // PRICE_BUCKET_SECONDS))
+
+@lru_cache(maxsize=4)
+def _get_hype_price(price_api, time_bucket):
+    """HYPE price lookup, cached per price API and time bucket"""
     try:
         # HYPE price feed ID for Pyth
         hype_feed_id = "0x4279e31cc369bbcc2faf022b382b080e32a8e689ff20fbc530d2a603eb6cd98b"
@@ -255,11 +411,11 @@ def get_hype_price(price_api):
         # Using Hermes API to get the latest price from Pyth
         url = f"{price_api}?ids%5B%5D={hype_feed_id}"
         
-        response = requests.get(url)
+        response = _SESSION.get(url, timeout=HTTP_TIMEOUT)
         if response.status_code != 200:
             return None
         
-        data = response.json()
+        data = _loads(response.content)
         if not data or "parsed" not in data or len(data["parsed"]) == 0:
             return None
         
@@ -273,33 +429,85 @@ def get_hype_price(price_api):
     except Exception as e:
         return None
 
+# Per-wallet API calls that fetch_wallet_snapshot can batch
+WALLET_CALLS = {
+    "balances": get_token_balances,
+    "staked": get_staking_balance,
+    "trades": get_trade_history
+}
+
+def fetch_wallet_snapshot(wallets, api_endpoint, kinds=tuple(WALLET_CALLS), calls=WALLET_CALLS):
+    """Fetch the requested data for every wallet concurrently, keyed by (wallet, kind)"""
+    # Network latency dominates, so all (wallet, kind) calls run at once on the
+    # shared request cache's thread pool, which also dedupes calls already in flight
+    futures = {
+        request_cache.cache((calls[kind], wallet, api_endpoint), calls[kind], wallet, api_endpoint): (wallet, kind)
+        for wallet in wallets
+        for kind in kinds
+    }
+    return {futures[future]: future.result() for future in as_completed(futures)}
+
 # ---- Calculations ----
+# Dashboard time periods and how far back each reaches (None means all time)
+PERIOD_MAP = {
+    '24 hours': timedelta(hours=24),
+    '7 days': timedelta(days=7),
+    '30 days': timedelta(days=30),
+    'All time': None
+}
+
+# Period start times are reused within a bucket of this many seconds
+PERIOD_BUCKET_SECONDS = 60
+
+@lru_cache(maxsize=8)
+def _period_start(span, now_bucket):
+    """Start of the period reaching back span from now, computed once per bucket"""
+    if span is None:
+        return None
+    return datetime.now() - span
+
+def period_start(period):
+    """Start datetime for a PERIOD_MAP label or a timedelta (None means all time)"""
+    span = PERIOD_MAP[period] if isinstance(period, str) else period
+    return _period_start(span, int(time.time() // PERIOD_BUCKET_SECONDS))
+
+def wallet_seed(wallet):
+    """Stable small-integer seed for a wallet's pseudo-random demo data"""
+    return zlib.crc32(wallet.encode())
+
 def calculate_portfolio_value(balances, prices):
     """Calculate total portfolio value"""
-    total_value = 0
-    for balance in balances:
-        coin = balance.get("coin", "Unknown")
-        amount = float(balance.get("total", 0))
-        price = prices.get(coin, 0)
-        total_value += amount * price
-    return total_value
+    # Gather amounts and prices into arrays and reduce with one dot product
+    amounts = np.fromiter((float(b.get("total", 0)) for b in balances), dtype=np.float64, count=len(balances))
+    coin_prices = np.fromiter((prices.get(b.get("coin", "Unknown"), 0) for b in balances), dtype=np.float64, count=len(balances))
+    return float(amounts @ coin_prices)
+
+def balances_to_df(balances, prices):
+    """Build a Token/Balance/Price/Value table from balances, largest value first"""
+    df = pd.DataFrame(balances, columns=["coin", "total"]).rename(columns={"coin": "Token", "total": "Balance"})
+    df["Balance"] = pd.to_numeric(df["Balance"], errors="coerce").fillna(0)
+    df["Price"] = df["Token"].map(prices).fillna(0)
+    df["Value"] = df["Balance"] * df["Price"]
+    return df[df["Balance"] > 0].sort_values("Value", ascending=False)
 
-def calculate_pnl(trades_df, current_prices, time_period='30 days'):
-    """Calculate P&L from trade history"""
+def slice_trades_since(trades_df, cutoff):
+    """Trades at or after cutoff, using a binary search when timestamps are sorted"""
+    if cutoff is None:
+        return trades_df
+    
+    timestamps = trades_df['timestamp']
+    if timestamps.is_monotonic_increasing:
+        return trades_df.iloc[timestamps.searchsorted(pd.Timestamp(cutoff)):]
+    
+    return trades_df[timestamps >= cutoff]
+
+def calculate_pnl(trades_df, current_prices, cutoff=None):
+    """Calculate P&L from trade history since cutoff"""
     if trades_df.empty:
         return 0, 0
     
-    # Convert time period to days
-    days = {
-        '24 hours': 1,
-        '7 days': 7,
-        '30 days': 30,
-        'All time': 9999
-    }.get(time_period, 30)
-    
-    # Filter trades by time period
-    start_date = datetime.now() - timedelta(days=days)
-    period_trades = trades_df[trades_df['timestamp'] >= start_date]
+    # Filter trades to the period starting at cutoff (None means all time)
+    period_trades = slice_trades_since(trades_df, cutoff)
     
     if period_trades.empty:
         return 0, 0
@@ -308,15 +516,12 @@ def calculate_pnl(trades_df, current_prices, time_period='30 days'):
     if 'pnl' in period_trades.columns:
         total_pnl = period_trades['pnl'].sum()
     else:
-        # Otherwise, calculate a rough estimate based on buys and sells
-        buys = period_trades[period_trades['side'] == 'buy']
-        sells = period_trades[period_trades['side'] == 'sell']
+        # Otherwise, calculate a rough estimate based on buys and sells,
+        # summing both sides in a single groupby pass
+        side_totals = period_trades.groupby('side', observed=True)['value_usd'].sum()
         
         # Simple PnL calculation (this is a simplification)
-        buy_value = buys['value_usd'].sum() if not buys.empty else 0
-        sell_value = sells['value_usd'].sum() if not sells.empty else 0
-        
-        total_pnl = sell_value - buy_value
+        total_pnl = float(side_totals.get('sell', 0) - side_totals.get('buy', 0))
     
     # Calculate percentage (rough estimate)
     investment = period_trades['value_usd'].sum() / 2  # Rough estimate of capital invested
@@ -324,140 +529,221 @@ def calculate_pnl(trades_df, current_prices, time_period='30 days'):
     
     return total_pnl, pnl_percentage
 
-def calculate_volume(trades_df, time_period='30 days'):
-    """Calculate trading volume"""
+def calculate_volume(trades_df, cutoff=None):
+    """Calculate trading volume since cutoff"""
     if trades_df.empty:
         return 0
     
-    # Convert time period to days
-    days = {
-        '24 hours': 1,
-        '7 days': 7,
-        '30 days': 30,
-        'All time': 9999
-    }.get(time_period, 30)
-    
-    # Filter trades by time period
-    start_date = datetime.now() - timedelta(days=days)
-    period_trades = trades_df[trades_df['timestamp'] >= start_date]
+    # Filter trades to the period starting at cutoff (None means all time)
+    period_trades = slice_trades_since(trades_df, cutoff)
     
     if period_trades.empty:
         return 0
     
-    # Calculate total volume
+    # Calculate total volume on the raw arrays
     if 'value_usd' in period_trades.columns:
-        return period_trades['value_usd'].sum()
+        return float(period_trades['value_usd'].to_numpy().sum())
     elif 'size' in period_trades.columns and 'price' in period_trades.columns:
-        return (period_trades['size'] * period_trades['price']).sum()
+        return float(period_trades['size'].to_numpy() @ period_trades['price'].to_numpy())
     else:
         return 0
 
 # ---- Data Storage ----
+# Fixed SQL statements, shared so each is prepared once and reused from the statement cache
+_SQL_DELETE_TRADES_SINCE = "DELETE FROM trades WHERE wallet = ? AND timestamp >= ?"
+_SQL_INSERT_BAL = "INSERT INTO balances (wallet, timestamp, coin, amount, price, value_usd) VALUES (?, ?, ?, ?, ?, ?)"
+_SQL_INSERT_TRADE = "INSERT INTO trades (wallet, timestamp, coin, side, size, price, fee, value_usd) VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+_SQL_LATEST_BAL_WALLET = """SELECT * FROM balances
+    WHERE wallet = ? AND timestamp = (SELECT MAX(timestamp) FROM balances WHERE wallet = ?)"""
+_SQL_HIST_BAL_WALLET = "SELECT * FROM balances WHERE wallet = ? AND timestamp >= ? ORDER BY timestamp"
+_SQL_HIST_BAL = "SELECT * FROM balances WHERE timestamp >= ? ORDER BY timestamp"
+_SQL_RECENT_TRADES_WALLET = "SELECT * FROM trades WHERE wallet = ? ORDER BY timestamp DESC LIMIT ?"
+_SQL_RECENT_TRADES = "SELECT * FROM trades ORDER BY timestamp DESC LIMIT ?"
+_SQL_TRADES_WALLET_SINCE = "SELECT * FROM trades WHERE wallet = ? AND timestamp >= ? ORDER BY timestamp"
+_SQL_TRADES_WALLET = "SELECT * FROM trades WHERE wallet = ? ORDER BY timestamp"
+
 def store_wallet_data(conn, wallet, balances, prices, trades=None):
     """Store wallet data in the database"""
-    cursor = conn.cursor()
-    timestamp = datetime.now().isoformat()
-    
-    # Store balances
+    store_wallet_data_bulk(conn, [(wallet, balances, trades)], prices)
+
+def _balance_rows(wallet, balances, prices, timestamp):
+    """Rows for the balances table from one wallet's balances"""
+    rows = []
     for balance in balances:
         coin = balance.get("coin", "Unknown")
         amount = float(balance.get("total", 0))
         price = prices.get(coin, 0)
-        value_usd = amount * price
+        rows.append((wallet, timestamp, coin, amount, price, amount * price))
+    return rows
+
+# Trade columns written to the trades table, in insert order
+TRADE_COLUMNS = ['timestamp', 'coin', 'side', 'size', 'price', 'fee', 'value_usd']
+
+def _normalize_trades(trades):
+    """Trade history reduced to TRADE_COLUMNS with incomplete fills dropped, or None if nothing to store"""
+    # Skip if we don't have essential data
+    if trades is None or trades.empty or not {'timestamp', 'coin', 'side', 'size', 'price'}.issubset(trades.columns):
+        return None
+    
+    # Normalize once: drop incomplete fills and default optional columns to zero
+    trades = trades.dropna(subset=['timestamp', 'coin', 'side', 'size', 'price'])
+    trades = trades.reindex(columns=TRADE_COLUMNS, fill_value=0).fillna({'fee': 0, 'value_usd': 0})
+    return trades if not trades.empty else None
+
+def _trade_row_iter(wallet, trades):
+    """Yield rows for the trades table from one wallet's normalized trade history"""
+    # Plain tuples (name=None) skip both the per-row Series and the namedtuple class
+    for ts, coin, side, size, price, fee, value_usd in trades.itertuples(index=False, name=None):
+        yield (wallet, ts.isoformat(), coin, side, float(size), float(price), float(fee), float(value_usd))
+
+def store_wallet_data_bulk(conn, snapshots, prices, since=None):
+    """Store (wallet, balances, trades) snapshots for many wallets in a single transaction"""
+    # since is the start of the fetched trade window; stored trades from then on are replaced.
+    # A None balances or trades entry leaves that part of the wallet untouched
+    timestamp = datetime.now().isoformat()
+    balance_rows = []
+    trade_windows = []
+    trade_frames = []
+    
+    for wallet, balances, trades in snapshots:
+        if balances is not None:
+            balance_rows.extend(_balance_rows(wallet, balances, prices, timestamp))
         
-        cursor.execute(
-            "INSERT INTO balances (wallet, timestamp, coin, amount, price, value_usd) VALUES (?, ?, ?, ?, ?, ?)",
-            (wallet, timestamp, coin, amount, price, value_usd)
-        )
-    
-    # Store trades if provided
-    if trades is not None and not trades.empty:
-        for _, trade in trades.iterrows():
-            # Skip if we don't have essential data
-            if 'timestamp' not in trade or 'coin' not in trade or 'side' not in trade or 'size' not in trade or 'price' not in trade:
-                continue
-                
-            cursor.execute(
-                "INSERT INTO trades (wallet, timestamp, coin, side, size, price, fee, value_usd) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
-                (
-                    wallet,
-                    trade.get('timestamp').isoformat(),
-                    trade.get('coin', 'Unknown'),
-                    trade.get('side', 'unknown'),
-                    float(trade.get('size', 0)),
-                    float(trade.get('price', 0)),
-                    float(trade.get('fee', 0)),
-                    float(trade.get('value_usd', 0))
-                )
-            )
+        if trades is None:
+            continue
+        trades = _normalize_trades(trades)
+        if since is not None:
+            # Replace the whole fetch window, even when it now holds no trades
+            trade_windows.append((wallet, since.isoformat()))
+            if trades is not None:
+                trades = trades[trades['timestamp'] >= since]
+        elif trades is not None:
+            # Replace the window covered by this fetch so repeated updates don't duplicate trades
+            trade_windows.append((wallet, trades['timestamp'].min().isoformat()))
+        if trades is not None and not trades.empty:
+            trade_frames.append((wallet, trades))
     
-    conn.commit()
+    # Trade rows are streamed into executemany so only one tuple is alive at a time
+    trade_rows = chain.from_iterable(_trade_row_iter(wallet, trades) for wallet, trades in trade_frames)
+    
+    # One transaction and one prepared statement per table for all wallets
+    with _DB_LOCK, conn:
+        conn.executemany(_SQL_DELETE_TRADES_SINCE, trade_windows)
+        conn.executemany(_SQL_INSERT_BAL, balance_rows)
+        conn.executemany(_SQL_INSERT_TRADE, trade_rows)
+
+def _query(conn, sql, params=()):
+    """Run a read query under the connection lock and return all rows"""
+    with _DB_LOCK:
+        return conn.execute(sql, params).fetchall()
 
 def get_latest_balances(conn, wallet=None):
-    """Get latest balances for a wallet or all wallets"""
-    cursor = conn.cursor()
-    
-    if wallet:
-        # Get most recent timestamp for this wallet
-        cursor.execute(
-            "SELECT MAX(timestamp) as max_time FROM balances WHERE wallet = ?",
-            (wallet,)
-        )
-        result = cursor.fetchone()
-        if not result or not result['max_time']:
+    """Get latest balances for a wallet, a list of wallets, or all wallets"""
+    if isinstance(wallet, str):
+        # Resolve the latest snapshot in the same statement; both lookups use the (wallet, timestamp) index
+        rows = _query(conn, _SQL_LATEST_BAL_WALLET, (wallet, wallet))
+    else:
+        # An empty wallet list selects nothing, unlike None which selects every wallet
+        if wallet is not None and not wallet:
             return []
-            
-        max_time = result['max_time']
         
-        # Get balances at that timestamp
-        cursor.execute(
-            "SELECT * FROM balances WHERE wallet = ? AND timestamp = ?",
-            (wallet, max_time)
-        )
-    else:
-        # For all wallets, get latest balances (more complex query)
-        cursor.execute("""
-            SELECT b.* FROM balances b
-            INNER JOIN (
-                SELECT wallet, MAX(timestamp) as max_time 
-                FROM balances 
-                GROUP BY wallet
-            ) t ON b.wallet = t.wallet AND b.timestamp = t.max_time
-        """)
-    
-    return [dict(row) for row in cursor.fetchall()]
+        # Rank snapshots per wallet newest first in one indexed pass;
+        # RANK keeps every coin row tied at the latest timestamp
+        wallet_filter, params = "", ()
+        if wallet is not None:
+            wallet_filter = f"WHERE wallet IN ({','.join('?' * len(wallet))})"
+            params = tuple(wallet)
+        rows = _query(conn, f"""
+            SELECT id, wallet, timestamp, coin, amount, price, value_usd FROM (
+                SELECT *, RANK() OVER (PARTITION BY wallet ORDER BY timestamp DESC) AS rn
+                FROM balances {wallet_filter}
+            ) WHERE rn = 1
+        """, params)
+    
+    return [dict(row) for row in rows]
 
 def get_historical_balances(conn, wallet=None, days=30):
     """Get historical balances for charting"""
-    cursor = conn.cursor()
-    start_date = (datetime.now() - timedelta(days=days)).isoformat()
+    start_date = period_start(timedelta(days=days)).isoformat()
     
     if wallet:
-        cursor.execute(
-            "SELECT * FROM balances WHERE wallet = ? AND timestamp >= ? ORDER BY timestamp",
-            (wallet, start_date)
-        )
+        rows = _query(conn, _SQL_HIST_BAL_WALLET, (wallet, start_date))
     else:
-        cursor.execute(
-            "SELECT * FROM balances WHERE timestamp >= ? ORDER BY timestamp",
-            (start_date,)
-        )
+        rows = _query(conn, _SQL_HIST_BAL, (start_date,))
     
-    return [dict(row) for row in cursor.fetchall()]
+    return [dict(row) for row in rows]
 
 def get_recent_trades(conn, wallet=None, limit=50):
     """Get recent trades"""
-    cursor = conn.cursor()
-    
     if wallet:
-        cursor.execute(
-            "SELECT * FROM trades WHERE wallet = ? ORDER BY timestamp DESC LIMIT ?",
-            (wallet, limit)
-        )
+        rows = _query(conn, _SQL_RECENT_TRADES_WALLET, (wallet, limit))
     else:
-        cursor.execute(
-            "SELECT * FROM trades ORDER BY timestamp DESC LIMIT ?",
-            (limit,)
-        )
+        rows = _query(conn, _SQL_RECENT_TRADES, (limit,))
+    
+    return [dict(row) for row in rows]
+
+# Column dtypes of trades table reads
+_TRADE_TABLE_DTYPES = {
+    'id': 'int64',
+    'size': 'float64',
+    'price': 'float64',
+    'fee': 'float64',
+    'value_usd': 'float64'
+}
+
+def get_trades_since(conn, wallet, since=None):
+    """Get stored trades for a wallet as a DataFrame, optionally from a cutoff onwards"""
+    with _DB_LOCK:
+        if since:
+            cursor = conn.execute(_SQL_TRADES_WALLET_SINCE, (wallet, since.isoformat()))
+        else:
+            cursor = conn.execute(_SQL_TRADES_WALLET, (wallet,))
+        
+        columns = [col[0] for col in cursor.description]
+        rows = cursor.fetchall()
+    
+    # Typed even when empty, so concatenating a wallet with no trades keeps numeric columns numeric
+    df = pd.DataFrame([tuple(row) for row in rows], columns=columns).astype(_TRADE_TABLE_DTYPES)
+    df['timestamp'] = pd.to_datetime(df['timestamp'], format='ISO8601')
+    return df
+
+def get_daily_volume(conn, wallets, since=None):
+    """Get daily trading volume per wallet, aggregated in SQL"""
+    if not wallets:
+        return pd.DataFrame(columns=['wallet', 'date', 'value_usd'])
+    
+    placeholders = ', '.join('?' for _ in wallets)
+    params = list(wallets)
+    query = f"SELECT wallet, date(timestamp) AS date, SUM(value_usd) AS value_usd FROM trades WHERE wallet IN ({placeholders})"
+    
+    if since:
+        query += " AND timestamp >= ?"
+        params.append(since.isoformat())
+    
+    rows = _query(conn, query + " GROUP BY wallet, date(timestamp) ORDER BY date", params)
+    
+    df = pd.DataFrame([tuple(row) for row in rows], columns=['wallet', 'date', 'value_usd'])
+    df['date'] = pd.to_datetime(df['date'])
+    return df
+
+def get_last_stored(conn, wallets):
+    """Time of the latest stored balance snapshot per wallet, as ISO strings"""
+    if not wallets:
+        return {}
+    
+    placeholders = ', '.join('?' for _ in wallets)
+    rows = _query(
+        conn,
+        f"SELECT wallet, MAX(timestamp) AS last_stored FROM balances WHERE wallet IN ({placeholders}) GROUP BY wallet",
+        list(wallets)
+    )
+    return {row['wallet']: row['last_stored'] for row in rows}
+
+def get_wallets_with_trades(conn, wallets):
+    """The subset of wallets that have any stored trades"""
+    if not wallets:
+        return set()
     
-    return [dict(row) for row in cursor.fetchall()]
\ No newline at end of file
+    placeholders = ', '.join('?' for _ in wallets)
+    rows = _query(conn, f"SELECT DISTINCT wallet FROM trades WHERE wallet IN ({placeholders})", list(wallets))
+    return {row['wallet'] for row in rows}